@@ -6,6 +6,7 @@ from datetime import datetime
 import flask
 import kombu
 from flask_login import current_user, login_required
+import sqlalchemy
 from sqlalchemy.orm import with_polymorphic
 from sqlalchemy.sql import text
 from werkzeug.exceptions import Forbidden, Gone, NotFound
@@ -20,6 +21,7 @@ from iib.web.models import (
     Operator,
     Request,
     RequestAdd,
+    RequestAddBundle,
     RequestMergeIndexImage,
     RequestRegenerateBundle,
     RequestRm,
@@ -29,7 +31,13 @@ from iib.web.models import (
     RequestTypeMapping,
     RequestCreateEmptyIndex,
 )
-from iib.web.utils import pagination_metadata, str_to_bool
+from iib.web.utils import (
+    get_build_cache_key,
+    invalidate_build_cache,
+    paginate,
+    pagination_metadata,
+    str_to_bool,
+)
 from iib.workers.tasks.build import (
     handle_add_request,
     handle_rm_request,
@@ -149,10 +157,28 @@ def get_build(request_id):
     :rtype: flask.Response
     :raise NotFound: if the request is not found
     """
-    # Create an alias class to load the polymorphic classes
-    poly_request = with_polymorphic(Request, '*')
-    query = poly_request.query.options(*get_request_query_options(verbose=True))
-    return flask.jsonify(query.get_or_404(request_id).to_json())
+
+    def _get_request_json():
+        # Create an alias class to load the polymorphic classes
+        poly_request = with_polymorphic(Request, '*')
+        query = db.session.query(poly_request).options(
+            *get_request_query_options(poly_request, verbose=True)
+        )
+        return query.filter(poly_request.id == request_id).first_or_404().to_json()
+
+    dogpile_region = flask.current_app.extensions['iib_dogpile_region']
+    # The changes to a request remove its cached JSON, but if they are committed while this is
+    # generating the JSON from the previous state of the request, the stale JSON is still cached
+    # afterwards. It's then shown until it expires after IIB_DOGPILE_EXPIRATION_TIME seconds or the
+    # request changes again.
+    rv = dogpile_region.get_or_create(get_build_cache_key(request_id), _get_request_json)
+    if 'logs' in rv:
+        # The logs URL depends on the host the API was accessed with, so don't use the cached one.
+        # Copy the cached JSON instead of modifying it since the backend may return the same object.
+        logs_url = flask.url_for('.get_build_logs', request_id=request_id, _external=True)
+        rv = dict(rv, logs=dict(rv['logs'], url=logs_url))
+
+    return flask.jsonify(rv)
 
 
 @api_v1.route('/builds/<int:request_id>/logs')
@@ -197,20 +223,38 @@ def get_builds():
     verbose = str_to_bool(flask.request.args.get('verbose'))
     max_per_page = flask.current_app.config['IIB_MAX_PER_PAGE']
 
-    # Create an alias class to load the polymorphic classes
-    poly_request = with_polymorphic(Request, '*')
-    query = poly_request.query.options(*get_request_query_options(verbose=verbose))
+    state_int = None
     if state:
         RequestStateMapping.validate_state(state)
         state_int = RequestStateMapping.__members__[state].value
-        query = query.join(Request.state)
-        query = query.filter(RequestState.state == state_int)
 
     if batch_id is not None:
         batch_id = Batch.validate_batch(batch_id)
-        query = query.filter_by(batch_id=batch_id)
 
-    pagination_query = query.order_by(Request.id.desc()).paginate(max_per_page=max_per_page)
+    def _filter_requests(query, request_entity):
+        # The same filters are applied to the query for the page and the query counting the
+        # requests, so that the total always matches the requests being paginated
+        if state_int is not None:
+            query = query.join(request_entity.state).filter(RequestState.state == state_int)
+        if batch_id is not None:
+            query = query.filter(request_entity.batch_id == batch_id)
+        return query
+
+    # Create an alias class to load the polymorphic classes
+    poly_request = with_polymorphic(Request, '*')
+    query = _filter_requests(
+        db.session.query(poly_request).options(
+            *get_request_query_options(poly_request, verbose=verbose)
+        ),
+        poly_request,
+    )
+    # Count the requests on the request table alone rather than wrapping the query above, since the
+    # joins for the subclass tables and the eager loading don't change the number of requests
+    count_query = _filter_requests(db.session.query(sqlalchemy.func.count(Request.id)), Request)
+
+    pagination_query = paginate(
+        query.order_by(poly_request.id.desc()), count_query, max_per_page=max_per_page
+    )
     requests = pagination_query.items
 
     query_params = {}
@@ -407,19 +451,30 @@ def patch_request(request_id):
         # SQLAlchemy will not add the object to the database if it's already present
         setattr(request, key, key_object)
 
-    for arch in payload.get('arches', []):
-        request.add_architecture(arch)
+    request.add_architectures(payload.get('arches', []))
 
+    bundle_imgs = []
     for operator, bundles in payload.get('bundle_mapping', {}).items():
         operator_img = Operator.get_or_create(operator)
         for bundle in bundles:
             bundle_img = Image.get_or_create(bundle)
             bundle_img.operator = operator_img
+            bundle_imgs.append(bundle_img)
 
     if 'distribution_scope' in payload:
         request.distribution_scope = payload['distribution_scope']
 
+    changed_request_ids = {request.id}
+    if bundle_imgs:
+        # The operator is set on the bundle images, which are shared by every add request with
+        # those bundles, so the bundle_mapping of all of those requests changes
+        request_add_bundles = db.session.query(RequestAddBundle.request_add_id).filter(
+            RequestAddBundle.image_id.in_([bundle_img.id for bundle_img in bundle_imgs])
+        )
+        changed_request_ids.update(row.request_add_id for row in request_add_bundles)
+
     db.session.commit()
+    invalidate_build_cache(sorted(changed_request_ids))
 
     if state_updated:
         messaging.send_message_for_state_change(request)
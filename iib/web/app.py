@@ -2,6 +2,7 @@
 import logging
 import os
 
+from dogpile.cache import make_region
 from flask import Flask
 from flask.logging import default_handler
 from flask_login import LoginManager
@@ -148,6 +149,12 @@ def create_app(config_obj=None):  # pragma: no cover
     login_manager.init_app(app)
     login_manager.user_loader(user_loader)
     login_manager.request_loader(load_user_from_request)
+    # Initialize the cache of the build request JSON
+    app.extensions['iib_dogpile_region'] = make_region().configure(
+        app.config['IIB_DOGPILE_BACKEND'],
+        expiration_time=app.config['IIB_DOGPILE_EXPIRATION_TIME'],
+        arguments=app.config['IIB_DOGPILE_ARGUMENTS'],
+    )
 
     app.register_blueprint(docs)
     app.register_blueprint(api_v1, url_prefix='/api/v1')
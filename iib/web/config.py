@@ -1,8 +1,4 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
-import os
-import tempfile
-
-TEST_DB_FILE = os.path.join(tempfile.gettempdir(), 'iib.db')
 
 
 class Config(object):
@@ -11,6 +7,12 @@ class Config(object):
     # Additional loggers to set to the level defined in IIB_LOG_LEVEL
     IIB_ADDITIONAL_LOGGERS = []
     IIB_BINARY_IMAGE_CONFIG = {}
+    # Configuration for dogpile.cache, which caches the JSON of the build requests returned by
+    # GET /builds/<id>. Disabled by default (by using 'dogpile.cache.null').
+    # To enable caching set 'dogpile.cache.memcached' as backend.
+    IIB_DOGPILE_ARGUMENTS = {}
+    IIB_DOGPILE_BACKEND = 'dogpile.cache.null'
+    IIB_DOGPILE_EXPIRATION_TIME = 600
     IIB_GREENWAVE_CONFIG = {}
     IIB_LOG_FORMAT = '%(asctime)s %(name)s %(levelname)s %(module)s.%(funcName)s %(message)s'
     # This sets the level of the "flask.app" logger, which is accessed from current_app.logger
@@ -52,11 +54,13 @@ class TestingConfig(DevelopmentConfig):
 
     DEBUG = True
     IIB_WORKER_USERNAMES = ['worker@DOMAIN.LOCAL']
-    # IMPORTANT: don't use in-memory sqlite. Alembic migrations will create a new
-    # connection producing a new instance of the database which is deleted immediately
-    # after the migration completes...
-    #   https://github.com/miguelgrinberg/Flask-Migrate/issues/153
-    SQLALCHEMY_DATABASE_URI = f'sqlite:///{TEST_DB_FILE}'
+    # Flask-SQLAlchemy uses a StaticPool for in-memory sqlite, so the Alembic migrations and the
+    # application share the single connection that holds the database. This requires the
+    # migrations to use the application's engine (see migrations/env.py).
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    # The tests roll back their transaction explicitly. Resetting the single connection when it's
+    # returned to the pool, such as after the health check, would roll back the test's transaction.
+    SQLALCHEMY_ENGINE_OPTIONS = {'pool_reset_on_return': None}
     LOGIN_DISABLED = False
 
 
@@ -5,6 +5,7 @@ from werkzeug.exceptions import HTTPException
 
 from iib.exceptions import IIBError, ValidationError
 from iib.web import messaging, db
+from iib.web.utils import invalidate_build_cache
 
 
 def json_error(error):
@@ -44,6 +45,7 @@ def handle_broker_error(request):
     """
     request.add_state('failed', 'The scheduling of the request failed')
     db.session.commit()
+    invalidate_build_cache([request.id])
     messaging.send_message_for_state_change(request)
 
     error_message = f'The scheduling of the build request with ID {request.id} failed'
@@ -66,6 +68,7 @@ def handle_broker_batch_error(requests):
         messaging.send_message_for_state_change(req)
 
     db.session.commit()
+    invalidate_build_cache([req.id for req in requests])
     error_message = f'The scheduling of the build requests with IDs {", ".join(failed_ids)} failed'
     current_app.logger.exception(error_message)
 
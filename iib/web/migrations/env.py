@@ -5,8 +5,6 @@ from logging.config import fileConfig
 
 from alembic import context
 from flask import current_app
-from sqlalchemy import engine_from_config
-from sqlalchemy import pool
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -59,9 +57,9 @@ def run_migrations_online():
                 directives[:] = []
                 logger.info('No changes in schema detected.')
 
-    connectable = engine_from_config(
-        config.get_section(config.config_ini_section), prefix='sqlalchemy.', poolclass=pool.NullPool
-    )
+    # Reuse the application's engine instead of creating a new one. This is required for in-memory
+    # sqlite databases since a new engine would produce a new, empty database.
+    connectable = current_app.extensions['migrate'].db.engine
 
     with connectable.connect() as connection:
         context.configure(
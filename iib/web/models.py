@@ -8,7 +8,7 @@ from flask import current_app, url_for
 from flask_login import UserMixin, current_user
 import sqlalchemy
 from sqlalchemy.ext.declarative import declared_attr
-from sqlalchemy.orm import joinedload, load_only, validates
+from sqlalchemy.orm import joinedload, load_only, selectinload, subqueryload, validates
 from werkzeug.exceptions import Forbidden
 
 from iib.exceptions import ValidationError
@@ -213,6 +213,40 @@ class Image(db.Model):
 
         return image
 
+    @classmethod
+    def get_or_create_many(cls, pull_specifications):
+        """
+        Get the images from the database and create the ones that don't exist.
+
+        This is equivalent to calling ``get_or_create`` on each pull specification, but the
+        existing images are retrieved with a single query.
+
+        :param list pull_specifications: the pull specifications of the images
+        :return: a dictionary with the pull specifications as the keys and the Image objects as
+            the values; the Image objects will be added to the database session, but not
+            committed, if they were created
+        :rtype: dict
+        :raise ValidationError: if a pull_specification for an image is invalid
+        """
+        for pull_specification in pull_specifications:
+            if '@' not in pull_specification and ':' not in pull_specification:
+                raise ValidationError(
+                    f'Image {pull_specification} should have a tag or a digest specified.'
+                )
+
+        images = {}
+        if pull_specifications:
+            query = cls.query.filter(cls.pull_specification.in_(set(pull_specifications)))
+            images = {image.pull_specification: image for image in query}
+
+        for pull_specification in pull_specifications:
+            if pull_specification not in images:
+                image = Image(pull_specification=pull_specification)
+                db.session.add(image)
+                images[pull_specification] = image
+
+        return images
+
 
 class Operator(db.Model):
     """An operator that has been handled by IIB."""
@@ -367,14 +401,31 @@ class Request(db.Model):
         :param str arch_name: the architecture to add
         :raises ValidationError: if the architecture is invalid
         """
-        arch = db.session.query(Architecture).filter_by(name=arch_name).first()
-        if not arch:
-            arch = Architecture(name=arch_name)
-            db.session.add(arch)
-            db.session.flush()
+        self.add_architectures([arch_name])
+
+    def add_architectures(self, arch_names):
+        """
+        Add the architectures associated with this request.
+
+        The existing architectures are retrieved with a single query and the missing ones are
+        created.
+
+        :param list arch_names: the architectures to add
+        """
+        if not arch_names:
+            return
+
+        query = db.session.query(Architecture).filter(Architecture.name.in_(set(arch_names)))
+        arches = {arch.name: arch for arch in query}
+        for arch_name in arch_names:
+            arch = arches.get(arch_name)
+            if not arch:
+                arch = Architecture(name=arch_name)
+                db.session.add(arch)
+                arches[arch_name] = arch
 
-        if arch not in self.architectures:
-            self.architectures.append(arch)
+            if arch not in self.architectures:
+                self.architectures.append(arch)
 
     @classmethod
     def from_json(cls, kwargs):
@@ -603,43 +654,71 @@ class Batch(db.Model):
         return rv
 
 
-def get_request_query_options(verbose=False):
+def get_request_query_options(poly_request, verbose=False):
     """
     Get the query options for a SQLAlchemy query for one or more requests to output as JSON.
 
     This will add the joins ahead of time on relationships that are accessed in the ``to_json``
     methods to avoid individual select statements when the relationships are accessed.
 
+    :param sqlalchemy.orm.util.AliasedClass poly_request: the polymorphic request entity being
+        queried, as returned by ``with_polymorphic(Request, '*')``
     :param bool verbose: if the request relationships should be loaded for verbose JSON output
     :return: a list of SQLAlchemy query options
     :rtype: list
     """
+    request_add = poly_request.RequestAdd
+    request_create_empty_index = poly_request.RequestCreateEmptyIndex
+    request_merge_index_image = poly_request.RequestMergeIndexImage
+    request_regenerate_bundle = poly_request.RequestRegenerateBundle
+    request_rm = poly_request.RequestRm
     # Tell SQLAlchemy to join on the relationships that are part of the JSON to avoid
-    # additional SQL queries
+    # additional SQL queries. Collections are loaded in a single additional query each instead,
+    # since joining on them would multiply the rows and prevent a simple LIMIT when paginating.
     query_options = [
-        joinedload(Request.user),
-        joinedload(RequestAdd.binary_image),
-        joinedload(RequestAdd.binary_image_resolved),
-        joinedload(RequestAdd.bundles),
-        joinedload(RequestAdd.from_index),
-        joinedload(RequestAdd.from_index_resolved),
-        joinedload(RequestAdd.index_image),
-        joinedload(RequestAdd.index_image_resolved),
-        joinedload(RequestRegenerateBundle.bundle_image),
-        joinedload(RequestRegenerateBundle.from_bundle_image),
-        joinedload(RequestRegenerateBundle.from_bundle_image_resolved),
-        joinedload(RequestRm.binary_image),
-        joinedload(RequestRm.binary_image_resolved),
-        joinedload(RequestRm.from_index),
-        joinedload(RequestRm.from_index_resolved),
-        joinedload(RequestRm.index_image),
-        joinedload(RequestRm.index_image_resolved),
-        joinedload(RequestRm.operators),
+        joinedload(poly_request.batch),
+        joinedload(poly_request.user),
+        selectinload(poly_request.architectures),
+        joinedload(request_add.binary_image),
+        joinedload(request_add.binary_image_resolved),
+        selectinload(request_add.bundles).joinedload(Image.operator),
+        # Both RequestAdd and RequestMergeIndexImage have a deprecation_list, and only one selectin
+        # loader per attribute name applies to a polymorphic query. Load this one with a subquery
+        # load instead, which also uses a separate query and keeps the LIMIT on the page query.
+        subqueryload(request_add.deprecation_list),
+        joinedload(request_add.from_index),
+        joinedload(request_add.from_index_resolved),
+        joinedload(request_add.index_image),
+        joinedload(request_add.index_image_resolved),
+        joinedload(request_create_empty_index.binary_image),
+        joinedload(request_create_empty_index.binary_image_resolved),
+        joinedload(request_create_empty_index.from_index),
+        joinedload(request_create_empty_index.from_index_resolved),
+        joinedload(request_create_empty_index.index_image),
+        joinedload(request_create_empty_index.index_image_resolved),
+        joinedload(request_merge_index_image.binary_image),
+        joinedload(request_merge_index_image.binary_image_resolved),
+        selectinload(request_merge_index_image.deprecation_list),
+        joinedload(request_merge_index_image.index_image),
+        joinedload(request_merge_index_image.source_from_index),
+        joinedload(request_merge_index_image.source_from_index_resolved),
+        joinedload(request_merge_index_image.target_index),
+        joinedload(request_merge_index_image.target_index_resolved),
+        joinedload(request_regenerate_bundle.bundle_image),
+        joinedload(request_regenerate_bundle.from_bundle_image),
+        joinedload(request_regenerate_bundle.from_bundle_image_resolved),
+        joinedload(request_rm.binary_image),
+        joinedload(request_rm.binary_image_resolved),
+        joinedload(request_rm.from_index),
+        joinedload(request_rm.from_index_resolved),
+        joinedload(request_rm.index_image),
+        joinedload(request_rm.index_image_resolved),
+        selectinload(request_rm.operators),
     ]
     if verbose:
-        query_options.append(joinedload(Request.states))
+        query_options.append(selectinload(poly_request.states))
     else:
-        query_options.append(joinedload(Request.state))
+        query_options.append(joinedload(poly_request.state))
 
     return query_options
 
@@ -927,9 +1006,9 @@ class RequestAdd(Request, RequestIndexImageMixin):
         )
 
         for key in ('bundles', 'deprecation_list'):
-            request_kwargs[key] = [
-                Image.get_or_create(pull_specification=item) for item in request_kwargs.get(key, [])
-            ]
+            pull_specifications = request_kwargs.get(key, [])
+            images = Image.get_or_create_many(pull_specifications)
+            request_kwargs[key] = [images[item] for item in pull_specifications]
 
         request = cls(**request_kwargs)
         request.add_state('in_progress', 'The request was initiated')
@@ -1202,9 +1281,8 @@ class RequestMergeIndexImage(Request):
                 'The "deprecation_list" value should be an empty array or an array of strings'
             )
 
-        request_kwargs['deprecation_list'] = [
-            Image.get_or_create(pull_specification=item) for item in deprecation_list
-        ]
+        images = Image.get_or_create_many(deprecation_list)
+        request_kwargs['deprecation_list'] = [images[item] for item in deprecation_list]
 
         source_from_index = request_kwargs.pop('source_from_index', None)
         if not (isinstance(source_from_index, str) and source_from_index):
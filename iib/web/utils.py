@@ -1,5 +1,68 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
-from flask import request, url_for
+from flask import abort, current_app, request, url_for
+from flask_sqlalchemy import Pagination
+
+
+def get_build_cache_key(request_id):
+    """
+    Get the dogpile.cache key of the JSON of a build request.
+
+    :param int request_id: the ID of the build request
+    :return: the cache key
+    :rtype: str
+    """
+    return f'get_build|{request_id}'
+
+
+def invalidate_build_cache(request_ids):
+    """
+    Remove the cached JSON of the build requests.
+
+    This must be called after the changes to the build requests are committed.
+
+    :param list request_ids: the IDs of the build requests that changed
+    """
+    current_app.extensions['iib_dogpile_region'].delete_multi(
+        [get_build_cache_key(request_id) for request_id in request_ids]
+    )
+
+
+def paginate(query, count_query, max_per_page):
+    """
+    Paginate the query based on the ``page`` and ``per_page`` query parameters of the request.
+
+    This behaves like ``flask_sqlalchemy.BaseQuery.paginate``, except the total is determined by
+    the provided ``count_query`` instead of wrapping ``query`` in a subquery to count its rows.
+    This must be run as part of a Flask request.
+
+    :param sqlalchemy.orm.Query query: the query for the items to paginate
+    :param sqlalchemy.orm.Query count_query: a query which returns the total number of items that
+        ``query`` would return without pagination
+    :param int max_per_page: the maximum number of items per page
+    :return: the paginated query
+    :rtype: flask_sqlalchemy.Pagination
+    :raise NotFound: if the query parameters are invalid or the page doesn't exist
+    """
+    try:
+        page = int(request.args.get('page', 1))
+        per_page = min(int(request.args.get('per_page', 20)), max_per_page)
+    except (TypeError, ValueError):
+        abort(404)
+
+    if page < 1 or per_page < 0:
+        abort(404)
+
+    items = query.limit(per_page).offset((page - 1) * per_page).all()
+    if not items and page != 1:
+        abort(404)
+
+    # No need to count if this is the first page and there are fewer items than the page can hold
+    if page == 1 and len(items) < per_page:
+        total = len(items)
+    else:
+        total = count_query.scalar()
+
+    return Pagination(query, page, per_page, total, items)
 
 
 def pagination_metadata(pagination_query, **kwargs):
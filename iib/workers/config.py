@@ -128,6 +128,8 @@ class DevelopmentConfig(Config):
 class TestingConfig(DevelopmentConfig):
     """The testing IIB Celery configuration."""
 
+    # Use an in-process broker so that scheduling a task never reaches out to a real broker
+    broker_url = 'memory://'
     iib_docker_config_template = '/home/iib-worker/.docker/config.json.template'
     iib_greenwave_url = 'some_url'
     iib_omps_url = 'some_url'
@@ -1,14 +1,15 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
-import os
+import functools
 
+from dogpile.cache import make_region
 import flask_migrate
 import pytest
 import retry
+import sqlalchemy
 from unittest import mock
 
 from iib.web import models
 from iib.web.app import create_app, db as _db
-from iib.web.config import TEST_DB_FILE
 
 
 @pytest.fixture()
@@ -23,9 +24,17 @@ def app_no_auth(request):
     return _make_app(request, 'iib.web.config.TestingConfigNoAuth')
 
 
+@functools.lru_cache(maxsize=None)
+def _build_app(config):
+    """Create an application for the given config name only once per test session."""
+    return create_app(config)
+
+
 def _make_app(request, config):
-    """Create an application for the given config name."""
-    app = create_app(config)
+    """Return the application for the given config name."""
+    app = _build_app(config)
+    # The application is shared between tests, so restore its configuration after each test
+    original_config = app.config.copy()
     # Establish an application context before running the tests. This allows the use of
     # Flask-SQLAlchemy in the test setup.
     ctx = app.app_context()
@@ -33,6 +42,8 @@ def _make_app(request, config):
 
     def teardown():
         ctx.pop()
+        app.config.clear()
+        app.config.update(original_config)
 
     request.addfinalizer(teardown)
     return app
@@ -43,19 +54,79 @@ def auth_env():
     return {'REMOTE_USER': 'tbrady@DOMAIN.LOCAL'}
 
 
+@pytest.fixture(scope='session')
+def db_engine():
+    """Return the engine of the test database after running the migrations once per session."""
+    app = _build_app('iib.web.config.TestingConfig')
+    with app.app_context():
+        flask_migrate.upgrade()
+        engine = _db.engine
+
+    # pysqlite doesn't emit BEGIN, which breaks SAVEPOINT support, so take over starting the
+    # transactions as described in:
+    #   https://docs.sqlalchemy.org/en/13/dialects/sqlite.html#serializable-isolation-savepoints-transactional-ddl
+    # This is only done after the migrations since the in-memory database has a single connection.
+    raw_connection = engine.raw_connection()
+    raw_connection.connection.isolation_level = None
+    raw_connection.close()
+
+    @sqlalchemy.event.listens_for(engine, 'begin')
+    def do_begin(connection):
+        connection.execute('BEGIN')
+
+    return engine
+
+
 @pytest.fixture()
-def db(app, tmpdir):
+def db(app, db_engine):
     """Yield a DB with required app tables but with no records."""
-    # Clear the database for each test to ensure tests are idempotent.
-    try:
-        os.remove(TEST_DB_FILE)
-    except FileNotFoundError:
-        pass
+    # Run each test in a transaction that is rolled back at the end of the test instead of
+    # recreating the database
+    connection = db_engine.connect()
+    transaction = connection.begin()
+    session = _db.create_scoped_session(options={'bind': connection, 'binds': {}})
+    # Commits from the tests and the API release this savepoint instead of the transaction
+    session.begin_nested()
+
+    def restart_savepoint(db_session, db_transaction):
+        if db_transaction.nested and not db_transaction._parent.nested:
+            db_session.expire_all()
+            db_session.begin_nested()
+
+    sqlalchemy.event.listen(session, 'after_transaction_end', restart_savepoint)
+    # Flask-SQLAlchemy removes the session at the end of each request, which would lose track of
+    # the savepoint, so only expire the loaded objects instead
+    session.remove = session.expire_all
+    original_session = _db.session
+    _db.session = session
+
+    yield _db
+
+    _db.session = original_session
+    session.close()
+    transaction.rollback()
+    connection.close()
 
-    with app.app_context():
-        flask_migrate.upgrade()
 
-    return _db
+@pytest.fixture()
+def dogpile_region(app, monkeypatch):
+    """Cache the JSON of the build requests in memory for the duration of the test."""
+    region = make_region().configure('dogpile.cache.memory')
+    monkeypatch.setitem(app.extensions, 'iib_dogpile_region', region)
+    return region
+
+
+@pytest.fixture()
+def sql_statements(db):
+    """Yield the list of the SQL statements executed on the database while the test runs."""
+    statements = []
+
+    def _record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    sqlalchemy.event.listen(db.engine, 'before_cursor_execute', _record_statement)
+    yield statements
+    sqlalchemy.event.remove(db.engine, 'before_cursor_execute', _record_statement)
 
 
 @pytest.fixture()
@@ -6,7 +6,27 @@ import pytest
 from sqlalchemy.exc import DisconnectionError
 
 from iib.web.api_v1 import _get_unique_bundles
-from iib.web.models import Image, RequestAdd, RequestRm
+from iib.web.models import (
+    Batch,
+    Image,
+    Operator,
+    Request,
+    RequestAdd,
+    RequestAddBundle,
+    RequestCreateEmptyIndex,
+    RequestMergeIndexImage,
+    RequestRegenerateBundle,
+    RequestRm,
+    RequestState,
+    RequestStateMapping,
+    RequestTypeMapping,
+    User,
+)
+
+# Stable timestamps that the volatile timestamps in the API responses are replaced with so that the
+# responses can be compared to the expected JSON
+UPDATED_TIMESTAMP = '2020-02-12T17:03:00Z'
+LOGS_EXPIRATION = '2020-02-15T17:03:00Z'
 
 
 def test_get_build(app, auth_env, client, db):
@@ -18,29 +38,33 @@ def test_get_build(app, auth_env, client, db):
             'from_index': f'quay.io/namespace/repo:latest',
         }
         request = RequestAdd.from_json(data)
-        request.binary_image_resolved = Image.get_or_create(
-            'quay.io/namespace/binary_image@sha256:abcdef'
+        images = Image.get_or_create_many(
+            [
+                'quay.io/namespace/binary_image@sha256:abcdef',
+                'quay.io/namespace/from_index@sha256:defghi',
+                'quay.io/namespace/index@sha256:fghijk',
+            ]
         )
-        request.from_index_resolved = Image.get_or_create(
-            'quay.io/namespace/from_index@sha256:defghi'
-        )
-        request.index_image = Image.get_or_create('quay.io/namespace/index@sha256:fghijk')
-        request.add_architecture('amd64')
-        request.add_architecture('s390x')
+        request.binary_image_resolved = images['quay.io/namespace/binary_image@sha256:abcdef']
+        request.from_index_resolved = images['quay.io/namespace/from_index@sha256:defghi']
+        request.index_image = images['quay.io/namespace/index@sha256:fghijk']
+        request.add_architectures(['amd64', 's390x'])
         request.add_state('complete', 'Completed successfully')
         db.session.add(request)
         db.session.commit()
+        request_id = request.id
+        batch_id = request.batch_id
 
-    rv = client.get('/api/v1/builds/1').json
+    rv = client.get(f'/api/v1/builds/{request_id}').json
     for state in rv['state_history']:
-        # Set this to a stable timestamp so the tests are dependent on it
-        state['updated'] = '2020-02-12T17:03:00Z'
-    rv['updated'] = '2020-02-12T17:03:00Z'
-    rv['logs']['expiration'] = '2020-02-15T17:03:00Z'
+        # Set this to a stable timestamp so the tests aren't dependent on it
+        state['updated'] = UPDATED_TIMESTAMP
+    rv['updated'] = UPDATED_TIMESTAMP
+    rv['logs']['expiration'] = LOGS_EXPIRATION
 
     expected = {
         'arches': ['amd64', 's390x'],
-        'batch': 1,
+        'batch': batch_id,
         'batch_annotations': None,
         'binary_image': 'quay.io/namespace/binary_image:latest',
         'binary_image_resolved': 'quay.io/namespace/binary_image@sha256:abcdef',
@@ -50,12 +74,12 @@ def test_get_build(app, auth_env, client, db):
         'distribution_scope': None,
         'from_index': 'quay.io/namespace/repo:latest',
         'from_index_resolved': 'quay.io/namespace/from_index@sha256:defghi',
-        'id': 1,
+        'id': request_id,
         'index_image': 'quay.io/namespace/index@sha256:fghijk',
         'index_image_resolved': None,
         'logs': {
-            'url': 'http://localhost/api/v1/builds/1/logs',
-            'expiration': '2020-02-15T17:03:00Z',
+            'url': f'http://localhost/api/v1/builds/{request_id}/logs',
+            'expiration': LOGS_EXPIRATION,
         },
         'omps_operator_version': {},
         'organization': None,
@@ -66,50 +90,181 @@ def test_get_build(app, auth_env, client, db):
             {
                 'state': 'complete',
                 'state_reason': 'Completed successfully',
-                'updated': '2020-02-12T17:03:00Z',
+                'updated': UPDATED_TIMESTAMP,
             },
             {
                 'state': 'in_progress',
                 'state_reason': 'The request was initiated',
-                'updated': '2020-02-12T17:03:00Z',
+                'updated': UPDATED_TIMESTAMP,
             },
         ],
         'state_reason': 'Completed successfully',
-        'updated': '2020-02-12T17:03:00Z',
+        'updated': UPDATED_TIMESTAMP,
         'user': 'tbrady@DOMAIN.LOCAL',
     }
     assert rv == expected
 
 
-def test_get_builds(app, auth_env, client, db):
+@mock.patch('iib.web.api_v1.messaging.send_message_for_state_change')
+def test_get_build_cached(
+    mock_smfsc, client, db, dogpile_region, minimal_request_add, sql_statements, worker_auth_env
+):
+    minimal_request_add.add_state('in_progress', 'Starting things up')
+    db.session.commit()
+    request_id = minimal_request_add.id
+
+    assert client.get(f'/api/v1/builds/{request_id}').json['state'] == 'in_progress'
+
+    sql_statements.clear()
+    rv = client.get(f'/api/v1/builds/{request_id}', base_url='https://iib.domain.local')
+    # The cached JSON is used, but the logs URL still reflects how the API was accessed
+    assert sql_statements == []
+    assert rv.json['state'] == 'in_progress'
+    assert rv.json['logs']['url'] == f'https://iib.domain.local/api/v1/builds/{request_id}/logs'
+
+    rv = client.patch(
+        f'/api/v1/builds/{request_id}',
+        json={'state': 'complete', 'state_reason': 'All done!'},
+        environ_base=worker_auth_env,
+    )
+    assert rv.status_code == 200
+    # Patching the request invalidates the cached JSON
+    assert client.get(f'/api/v1/builds/{request_id}').json['state'] == 'complete'
+
+
+def test_get_build_cached_bundle_mapping(client, db, dogpile_region, worker_auth_env):
+    binary_image = Image.get_or_create('quay.io/namespace/binary_image:latest')
+    bundle = Image.get_or_create('q/bundle:1')
+    requests = []
+    for _ in range(2):
+        request = RequestAdd(batch=Batch(), binary_image=binary_image)
+        request.bundles.append(bundle)
+        request.add_architecture('amd64')
+        request.add_state('in_progress', 'Starting things up')
+        db.session.add(request)
+        requests.append(request)
+    db.session.commit()
+    request_a_id, request_b_id = (request.id for request in requests)
+
+    assert client.get(f'/api/v1/builds/{request_b_id}').json['bundle_mapping'] == {}
+
+    rv = client.patch(
+        f'/api/v1/builds/{request_a_id}',
+        json={'bundle_mapping': {'op': ['q/bundle:1']}},
+        environ_base=worker_auth_env,
+    )
+    assert rv.status_code == 200
+    # The bundle image is shared, so the cached JSON of the other request with it is invalidated
+    rv = client.get(f'/api/v1/builds/{request_b_id}')
+    assert rv.json['bundle_mapping'] == {'op': ['q/bundle:1']}
+
+
+@pytest.fixture()
+def builds(auth_env, db):
+    """
+    Create add requests for the build listing tests.
+
+    Every fifth request, starting with the first one, is failed and the others are in progress.
+    Each request is in its own batch with the same ID as the request.
+
+    :param dict auth_env: the environment of the user that owns the requests
+    :param flask_sqlalchemy.SQLAlchemy db: the connection to the database
+    :return: the number of requests that were created
+    :rtype: int
+    """
     total_requests = 50
-    # flask_login.current_user is used in RequestAdd.from_json, which requires a request context
-    with app.test_request_context(environ_base=auth_env):
-        for i in range(total_requests):
-            data = {
-                'binary_image': 'quay.io/namespace/binary_image:latest',
-                'bundles': [f'quay.io/namespace/bundle:{i}'],
-                'from_index': f'quay.io/namespace/repo:{i}',
+    user = User(username=auth_env['REMOTE_USER'])
+    binary_image = Image(pull_specification='quay.io/namespace/binary_image:latest')
+    db.session.add_all([user, binary_image])
+    db.session.flush()
+
+    # The tests only need the requests to exist, so insert the rows in bulk with SQLAlchemy Core
+    # instead of going through RequestAdd.from_json and the ORM for each request
+    request_ids = range(1, total_requests + 1)
+    failed_request_ids = [request_id for request_id in request_ids if request_id % 5 == 1]
+    # The in progress state of each request has the same ID as the request and the failed states
+    # come after them
+    failed_state_ids = {
+        request_id: total_requests + index
+        for index, request_id in enumerate(failed_request_ids, start=1)
+    }
+    db.session.execute(Batch.__table__.insert(), [{'id': request_id} for request_id in request_ids])
+    db.session.execute(
+        Request.__table__.insert(),
+        [
+            {
+                'id': request_id,
+                'batch_id': request_id,
+                'request_state_id': failed_state_ids.get(request_id, request_id),
+                'type': RequestTypeMapping.add.value,
+                'user_id': user.id,
             }
-            request = RequestAdd.from_json(data)
-            if i % 5 == 0:
-                request.add_state('failed', 'Failed due to an unknown error')
-            db.session.add(request)
-        db.session.commit()
+            for request_id in request_ids
+        ],
+    )
+    db.session.execute(
+        RequestAdd.__table__.insert(),
+        [{'id': request_id, 'binary_image_id': binary_image.id} for request_id in request_ids],
+    )
+    db.session.execute(
+        RequestState.__table__.insert(),
+        [
+            {
+                'id': request_id,
+                'request_id': request_id,
+                'state': RequestStateMapping.in_progress.value,
+                'state_reason': 'The request was initiated',
+            }
+            for request_id in request_ids
+        ]
+        + [
+            {
+                'id': state_id,
+                'request_id': request_id,
+                'state': RequestStateMapping.failed.value,
+                'state_reason': 'Failed due to an unknown error',
+            }
+            for request_id, state_id in failed_state_ids.items()
+        ],
+    )
+    # The bundle image of each request has an ID offset from the binary image
+    db.session.execute(
+        Image.__table__.insert(),
+        [
+            {
+                'id': binary_image.id + request_id,
+                'pull_specification': f'quay.io/namespace/bundle:{request_id}',
+            }
+            for request_id in request_ids
+        ],
+    )
+    db.session.execute(
+        RequestAddBundle.__table__.insert(),
+        [
+            {'request_add_id': request_id, 'image_id': binary_image.id + request_id}
+            for request_id in request_ids
+        ],
+    )
+    db.session.commit()
+    return total_requests
+
 
+def test_get_builds_pagination(app, builds, client):
     rv_json = client.get('/api/v1/builds?page=2').json
     # Verify the order_by is correct
-    assert rv_json['items'][0]['id'] == total_requests - app.config['IIB_MAX_PER_PAGE']
+    assert rv_json['items'][0]['id'] == builds - app.config['IIB_MAX_PER_PAGE']
     assert len(rv_json['items']) == app.config['IIB_MAX_PER_PAGE']
     # This key is only present the verbose=true
     assert 'state_history' not in rv_json['items'][0]
     assert rv_json['meta']['page'] == 2
     assert rv_json['meta']['pages'] == 3
     assert rv_json['meta']['per_page'] == app.config['IIB_MAX_PER_PAGE']
-    assert rv_json['meta']['total'] == total_requests
+    assert rv_json['meta']['total'] == builds
 
+
+def test_get_builds_state_filter(builds, client):
     rv_json = client.get('/api/v1/builds?state=failed&per_page=5').json
-    total_failed_requests = total_requests // 5
+    total_failed_requests = builds // 5
     assert len(rv_json['items']) == 5
     assert 'state=failed' in rv_json['meta']['next']
     assert rv_json['meta']['page'] == 1
@@ -117,16 +272,121 @@ def test_get_builds(app, auth_env, client, db):
     assert rv_json['meta']['per_page'] == 5
     assert rv_json['meta']['total'] == total_failed_requests
 
+
+def test_get_builds_batch_filter(builds, client):
     rv_json = client.get('/api/v1/builds?batch=3').json
     assert len(rv_json['items']) == 1
     assert 'batch=3' in rv_json['meta']['first']
     assert rv_json['meta']['total'] == 1
 
+
+def test_get_builds_count_query(builds, client, sql_statements):
+    rv = client.get('/api/v1/builds?state=in_progress&batch=2&per_page=1')
+    assert rv.status_code == 200
+    assert rv.json['meta']['total'] == 1
+    count_statements = [
+        statement for statement in sql_statements if statement.startswith('SELECT count(')
+    ]
+    assert len(count_statements) == 1
+    # The requests are counted on the request table with the same filters as the page, rather than
+    # by wrapping the query for the page in a subquery
+    assert count_statements[0].startswith('SELECT count(request.id) AS count_1 \nFROM request JOIN')
+    assert 'FROM (SELECT' not in count_statements[0]
+    assert 'request_add' not in count_statements[0]
+    assert 'request_state.state = ?' in count_statements[0]
+    assert 'request.batch_id = ?' in count_statements[0]
+
+
+@pytest.mark.parametrize('query_string', ('page=abc', 'page=0', 'per_page=-1', 'page=4'))
+def test_get_builds_invalid_page(query_string, builds, client):
+    rv = client.get(f'/api/v1/builds?{query_string}')
+    assert rv.status_code == 404
+
+
+def test_get_builds_verbose(builds, client):
     rv_json = client.get('/api/v1/builds?verbose=true&per_page=1').json
     # This key is only present the verbose=true
     assert 'state_history' in rv_json['items'][0]
 
 
+def _create_request_of_each_type(db, index):
+    binary_image = Image.get_or_create(f'quay.io/namespace/binary_image:{index}')
+    from_index = Image.get_or_create(f'quay.io/namespace/index:{index}')
+    add_request = RequestAdd(batch=Batch(), binary_image=binary_image, from_index=from_index)
+    add_request.bundles.append(Image.get_or_create(f'quay.io/namespace/bundle:{index}'))
+    add_request.deprecation_list.append(Image.get_or_create(f'quay.io/namespace/add-old:{index}'))
+    rm_request = RequestRm(batch=Batch(), binary_image=binary_image, from_index=from_index)
+    rm_request.operators.append(Operator.get_or_create(f'operator-{index}'))
+    regenerate_bundle_request = RequestRegenerateBundle(
+        batch=Batch(), from_bundle_image=Image.get_or_create(f'quay.io/namespace/regen:{index}')
+    )
+    merge_request = RequestMergeIndexImage(
+        batch=Batch(),
+        binary_image=binary_image,
+        source_from_index=from_index,
+        target_index=Image.get_or_create(f'quay.io/namespace/target:{index}'),
+    )
+    merge_request.deprecation_list.append(
+        Image.get_or_create(f'quay.io/namespace/merge-old:{index}')
+    )
+    create_empty_index_request = RequestCreateEmptyIndex(
+        batch=Batch(), binary_image=binary_image, from_index=from_index
+    )
+    for request in (
+        add_request,
+        rm_request,
+        regenerate_bundle_request,
+        merge_request,
+        create_empty_index_request,
+    ):
+        request.add_architecture('amd64')
+        request.add_state('in_progress', 'Starting up')
+        db.session.add(request)
+    db.session.commit()
+
+
+def test_get_builds_query_count(app, client, db, sql_statements):
+    def _get_builds(per_page):
+        sql_statements.clear()
+        rv = client.get(f'/api/v1/builds?verbose=true&per_page={per_page}')
+        assert rv.status_code == 200
+        return rv.json
+
+    # Always request full pages so that every call also counts the requests
+    _create_request_of_each_type(db, 0)
+    rv_json = _get_builds(per_page=5)
+    statement_count = len(sql_statements)
+    assert {item['request_type'] for item in rv_json['items']} == {
+        'add',
+        'create-empty-index',
+        'merge-index-image',
+        'regenerate-bundle',
+        'rm',
+    }
+
+    for index in range(1, 4):
+        _create_request_of_each_type(db, index)
+    rv_json = _get_builds(per_page=20)
+
+    # The number of statements must not grow with the number of requests on the page
+    assert len(sql_statements) == statement_count
+    # The page itself is selected with a plain LIMIT instead of being wrapped in a subquery
+    page_statement = next(
+        statement for statement in sql_statements if statement.startswith('SELECT')
+    )
+    assert page_statement.startswith('SELECT request.id')
+    assert 'FROM (SELECT' not in page_statement
+    # The requests are listed from the newest, so these are the ones from the last call above
+    deprecation_lists = {
+        item['request_type']: item['deprecation_list']
+        for item in rv_json['items'][:5]
+        if 'deprecation_list' in item
+    }
+    # Both request types with a deprecation_list are loaded with the correct images
+    assert deprecation_lists['add'] == ['quay.io/namespace/add-old:3']
+    assert deprecation_lists['merge-index-image'] == ['quay.io/namespace/merge-old:3']
+
+
 def test_get_builds_invalid_state(app, client, db):
     rv = client.get('/api/v1/builds?state=is_it_lunch_yet%3F')
     assert rv.status_code == 400
@@ -145,10 +405,14 @@ def test_get_builds_invalid_batch(batch, app, client, db):
     assert rv.json == {'error': 'The batch must be a positive integer'}
 
 
-@mock.patch('sqlalchemy.engine.base.Engine.execute')
-def test_get_healthcheck_db_fail(mock_db_execute, app, client, db):
-    mock_db_execute.side_effect = DisconnectionError('DB failed')
-    rv = client.get('/api/v1/healthcheck')
+def test_get_healthcheck_db_fail(app, client, db):
+    # Only patch the engine for the health check request so that no other database access in the
+    # test is affected
+    with mock.patch('sqlalchemy.engine.base.Engine.execute') as mock_db_execute:
+        mock_db_execute.side_effect = DisconnectionError('DB failed')
+        rv = client.get('/api/v1/healthcheck')
+
+    mock_db_execute.assert_called_once()
     assert rv.status_code == 500
     assert rv.json == {'error': 'Database health check failed.'}
 
@@ -291,11 +555,54 @@ def test_get_build_logs_not_configured(client, db, minimal_request_add):
             {'bundles': ['some:thing'], 'binary_image': 'binary:image', 'force_backport': 'spam'},
             '"force_backport" must be a boolean',
         ),
+        (
+            {'bundles': ['some:thing'], 'from_index': 'pull:spec', 'add_arches': ['s390x']},
+            'The "binary_image" value must be a non-empty string',
+        ),
+        (
+            {'add_arches': ['s390x'], 'binary_image': 'binary:image'},
+            '"from_index" must be specified if no bundles are specified',
+        ),
+        ({'add_arches': ['s390x']}, '"from_index" must be specified if no bundles are specified',),
+        (
+            {
+                'bundles': ['some:thing'],
+                'binary_image': 'binary:image',
+                'add_arches': ['s390x'],
+                'overwrite_from_index_token': 'username:password',
+            },
+            (
+                'The "overwrite_from_index" parameter is required when the '
+                '"overwrite_from_index_token" parameter is used'
+            ),
+        ),
+        (
+            {
+                'best_batsman': 'Virat Kohli',
+                'binary_image': 'binary:image',
+                'bundles': ['some:thing'],
+            },
+            'The following parameters are invalid: best_batsman',
+        ),
+        (
+            {
+                'binary_image': 'binary:image',
+                'add_arches': ['s390x'],
+                'organization': 'org',
+                'from_index': 'some:thing',
+                'distribution_scope': 'badvalue',
+            },
+            'The "distribution_scope" value must be one of "dev", "stage", or "prod"',
+        ),
+        (
+            {'bundles': ['some:thing'], 'binary_image': 'binary:image'},
+            'One of "from_index" or "add_arches" must be specified',
+        ),
     ),
 )
 @mock.patch('iib.web.api_v1.messaging.send_message_for_state_change')
-def test_add_bundles_invalid_params_format(mock_smfsc, data, error_msg, db, auth_env, client):
-    rv = client.post(f'/api/v1/builds/add', json=data, environ_base=auth_env)
+def test_add_bundle_invalid_params(mock_smfsc, data, error_msg, db, auth_env, client):
+    rv = client.post('/api/v1/builds/add', json=data, environ_base=auth_env)
     assert rv.status_code == 400
     assert error_msg == rv.json['error']
     mock_smfsc.assert_not_called()
@@ -389,40 +696,6 @@ def test_rm_operators_overwrite_not_allowed(mock_smfsc, client, db):
     mock_smfsc.assert_not_called()
 
 
-@pytest.mark.parametrize(
-    'data, error_msg',
-    (
-        (
-            {'bundles': ['some:thing'], 'from_index': 'pull:spec', 'add_arches': ['s390x']},
-            'The "binary_image" value must be a non-empty string',
-        ),
-        (
-            {'add_arches': ['s390x'], 'binary_image': 'binary:image'},
-            '"from_index" must be specified if no bundles are specified',
-        ),
-        ({'add_arches': ['s390x']}, '"from_index" must be specified if no bundles are specified',),
-        (
-            {
-                'bundles': ['some:thing'],
-                'binary_image': 'binary:image',
-                'add_arches': ['s390x'],
-                'overwrite_from_index_token': 'username:password',
-            },
-            (
-                'The "overwrite_from_index" parameter is required when the '
-                '"overwrite_from_index_token" parameter is used'
-            ),
-        ),
-    ),
-)
-@mock.patch('iib.web.api_v1.messaging.send_message_for_state_change')
-def test_add_bundle_missing_required_param(mock_smfsc, data, error_msg, db, auth_env, client):
-    rv = client.post(f'/api/v1/builds/add', json=data, environ_base=auth_env)
-    assert rv.status_code == 400
-    assert rv.json['error'] == error_msg
-    mock_smfsc.assert_not_called()
-
-
 @pytest.mark.parametrize(
     'data, error_msg',
     (
@@ -460,38 +733,6 @@ def test_rm_operator_missing_required_param(mock_smfsc, data, error_msg, db, aut
     mock_smfsc.assert_not_called()
 
 
-@mock.patch('iib.web.api_v1.messaging.send_message_for_state_change')
-def test_add_bundle_invalid_param(mock_smfsc, db, auth_env, client):
-    data = {
-        'best_batsman': 'Virat Kohli',
-        'binary_image': 'binary:image',
-        'bundles': ['some:thing'],
-    }
-
-    rv = client.post('/api/v1/builds/add', json=data, environ_base=auth_env)
-    assert rv.status_code == 400
-    assert rv.json['error'] == 'The following parameters are invalid: best_batsman'
-    mock_smfsc.assert_not_called()
-
-
-@mock.patch('iib.web.api_v1.messaging.send_message_for_state_change')
-def test_add_bundle_from_invalid_distribution_scope(mock_smfsc, db, auth_env, client):
-    data = {
-        'binary_image': 'binary:image',
-        'add_arches': ['s390x'],
-        'organization': 'org',
-        'from_index': 'some:thing',
-        'distribution_scope': 'badvalue',
-    }
-
-    rv = client.post('/api/v1/builds/add', json=data, environ_base=auth_env)
-    assert rv.status_code == 400
-    assert rv.json['error'] == (
-        'The "distribution_scope" value must be one of "dev", "stage", or "prod"'
-    )
-    mock_smfsc.assert_not_called()
-
-
 @mock.patch('iib.web.api_v1.messaging.send_message_for_state_change')
 def test_rm_bundle_from_invalid_distribution_scope(mock_smfsc, db, auth_env, client):
     data = {
@@ -510,16 +751,6 @@ def test_rm_bundle_from_invalid_distribution_scope(mock_smfsc, db, auth_env, cli
     mock_smfsc.assert_not_called()
 
 
-@mock.patch('iib.web.api_v1.messaging.send_message_for_state_change')
-def test_add_bundle_from_index_and_add_arches_missing(mock_smfsc, db, auth_env, client):
-    data = {'bundles': ['some:thing'], 'binary_image': 'binary:image'}
-
-    rv = client.post('/api/v1/builds/add', json=data, environ_base=auth_env)
-    assert rv.status_code == 400
-    assert rv.json['error'] == 'One of "from_index" or "add_arches" must be specified'
-    mock_smfsc.assert_not_called()
-
-
 @pytest.mark.parametrize(
     (
         'overwrite_from_index',
@@ -568,9 +799,13 @@ def test_add_bundle_success(
     if bundles:
         data['bundles'] = bundles
 
+    rv = client.post('/api/v1/builds/add', json=data, environ_base=auth_env)
+    rv_json = rv.json
+    request_id = rv_json['id']
+
     response_json = {
         'arches': [],
-        'batch': 1,
+        'batch': rv_json['batch'],
         'batch_annotations': None,
         'binary_image': 'binary:image',
         'binary_image_resolved': None,
@@ -580,15 +815,15 @@ def test_add_bundle_success(
         'distribution_scope': expected_distribution_scope,
         'from_index': from_index,
         'from_index_resolved': None,
-        'id': 1,
+        'id': request_id,
         'index_image': None,
         'index_image_resolved': None,
         'removed_operators': [],
         'request_type': 'add',
         'state': 'in_progress',
         'logs': {
-            'url': 'http://localhost/api/v1/builds/1/logs',
-            'expiration': '2020-02-15T17:03:00Z',
+            'url': f'http://localhost/api/v1/builds/{request_id}/logs',
+            'expiration': LOGS_EXPIRATION,
         },
         'omps_operator_version': {},
         'organization': 'org',
@@ -596,19 +831,17 @@ def test_add_bundle_success(
             {
                 'state': 'in_progress',
                 'state_reason': 'The request was initiated',
-                'updated': '2020-02-12T17:03:00Z',
+                'updated': UPDATED_TIMESTAMP,
             }
         ],
         'state_reason': 'The request was initiated',
-        'updated': '2020-02-12T17:03:00Z',
+        'updated': UPDATED_TIMESTAMP,
         'user': 'tbrady@DOMAIN.LOCAL',
     }
 
-    rv = client.post('/api/v1/builds/add', json=data, environ_base=auth_env)
-    rv_json = rv.json
-    rv_json['state_history'][0]['updated'] = '2020-02-12T17:03:00Z'
-    rv_json['updated'] = '2020-02-12T17:03:00Z'
-    rv_json['logs']['expiration'] = '2020-02-15T17:03:00Z'
+    rv_json['state_history'][0]['updated'] = UPDATED_TIMESTAMP
+    rv_json['updated'] = UPDATED_TIMESTAMP
+    rv_json['logs']['expiration'] = LOGS_EXPIRATION
     assert rv.status_code == 201
     assert response_json == rv_json
     assert 'cnr_token' not in rv_json
@@ -685,7 +918,15 @@ def test_add_bundle_overwrite_token_redacted(mock_smfsc, mock_har, app, auth_env
 @mock.patch('iib.web.api_v1.handle_add_request')
 @mock.patch('iib.web.api_v1.messaging.send_message_for_state_change')
 def test_add_bundle_custom_user_queue(
-    mock_smfsc, mock_har, app, auth_env, client, user_to_queue, overwrite_from_index, expected_queue
+    mock_smfsc,
+    mock_har,
+    app,
+    auth_env,
+    client,
+    db,
+    user_to_queue,
+    overwrite_from_index,
+    expected_queue,
 ):
     app.config['IIB_USER_TO_QUEUE'] = user_to_queue
     data = {'bundles': ['some:thing'], 'binary_image': 'binary:image', 'add_arches': ['s390x']}
@@ -912,25 +1153,22 @@ def test_patch_request_add_success(
         'id': minimal_request_add.id,
         'index_image': 'index:image',
         'index_image_resolved': 'index:image-resolved',
-        'logs': {
-            'url': 'http://localhost/api/v1/builds/1/logs',
-            'expiration': '2020-02-15T17:03:00Z',
-        },
+        'logs': {'url': 'http://localhost/api/v1/builds/1/logs', 'expiration': LOGS_EXPIRATION},
         'omps_operator_version': {},
         'organization': None,
         'removed_operators': [],
         'request_type': 'add',
         'state': 'complete',
         'state_history': [
-            {'state': 'complete', 'state_reason': 'All done!', 'updated': '2020-02-12T17:03:00Z'},
+            {'state': 'complete', 'state_reason': 'All done!', 'updated': UPDATED_TIMESTAMP},
             {
                 'state': 'in_progress',
                 'state_reason': 'Starting things up',
-                'updated': '2020-02-12T17:03:00Z',
+                'updated': UPDATED_TIMESTAMP,
             },
         ],
         'state_reason': 'All done!',
-        'updated': '2020-02-12T17:03:00Z',
+        'updated': UPDATED_TIMESTAMP,
         'user': None,
     }
 
@@ -944,10 +1182,10 @@ def test_patch_request_add_success(
     )
     rv_json = rv.json
     assert rv.status_code == 200, rv_json
-    rv_json['state_history'][0]['updated'] = '2020-02-12T17:03:00Z'
-    rv_json['state_history'][1]['updated'] = '2020-02-12T17:03:00Z'
-    rv_json['updated'] = '2020-02-12T17:03:00Z'
-    rv_json['logs']['expiration'] = '2020-02-15T17:03:00Z'
+    rv_json['state_history'][0]['updated'] = UPDATED_TIMESTAMP
+    rv_json['state_history'][1]['updated'] = UPDATED_TIMESTAMP
+    rv_json['updated'] = UPDATED_TIMESTAMP
+    rv_json['logs']['expiration'] = LOGS_EXPIRATION
     assert rv_json == response_json
     mock_smfsc.assert_called_once_with(mock.ANY)
 
@@ -978,24 +1216,21 @@ def test_patch_request_rm_success(mock_smfsc, db, minimal_request_rm, worker_aut
         'id': minimal_request_rm.id,
         'index_image': 'index:image',
         'index_image_resolved': 'index:image-resolved',
-        'logs': {
-            'url': 'http://localhost/api/v1/builds/1/logs',
-            'expiration': '2020-02-15T17:03:00Z',
-        },
+        'logs': {'url': 'http://localhost/api/v1/builds/1/logs', 'expiration': LOGS_EXPIRATION},
         'organization': None,
         'removed_operators': ['operator'],
         'request_type': 'rm',
         'state': 'complete',
         'state_history': [
-            {'state': 'complete', 'state_reason': 'All done!', 'updated': '2020-02-12T17:03:00Z'},
+            {'state': 'complete', 'state_reason': 'All done!', 'updated': UPDATED_TIMESTAMP},
             {
                 'state': 'in_progress',
                 'state_reason': 'Starting things up',
-                'updated': '2020-02-12T17:03:00Z',
+                'updated': UPDATED_TIMESTAMP,
             },
         ],
         'state_reason': 'All done!',
-        'updated': '2020-02-12T17:03:00Z',
+        'updated': UPDATED_TIMESTAMP,
         'user': None,
     }
 
@@ -1007,10 +1242,10 @@ def test_patch_request_rm_success(mock_smfsc, db, minimal_request_rm, worker_aut
     )
     rv_json = rv.json
     assert rv.status_code == 200, rv_json
-    rv_json['state_history'][0]['updated'] = '2020-02-12T17:03:00Z'
-    rv_json['state_history'][1]['updated'] = '2020-02-12T17:03:00Z'
-    rv_json['updated'] = '2020-02-12T17:03:00Z'
-    rv_json['logs']['expiration'] = '2020-02-15T17:03:00Z'
+    rv_json['state_history'][0]['updated'] = UPDATED_TIMESTAMP
+    rv_json['state_history'][1]['updated'] = UPDATED_TIMESTAMP
+    rv_json['updated'] = UPDATED_TIMESTAMP
+    rv_json['logs']['expiration'] = LOGS_EXPIRATION
     assert rv_json == response_json
     mock_smfsc.assert_called_once_with(mock.ANY)
 
@@ -1035,23 +1270,20 @@ def test_patch_request_regenerate_bundle_success(
         'from_bundle_image': minimal_request_regenerate_bundle.from_bundle_image.pull_specification,
         'from_bundle_image_resolved': 'from-bundle-image:resolved',
         'id': minimal_request_regenerate_bundle.id,
-        'logs': {
-            'url': 'http://localhost/api/v1/builds/1/logs',
-            'expiration': '2020-02-15T17:03:00Z',
-        },
+        'logs': {'url': 'http://localhost/api/v1/builds/1/logs', 'expiration': LOGS_EXPIRATION},
         'organization': None,
         'request_type': 'regenerate-bundle',
         'state': 'complete',
         'state_history': [
-            {'state': 'complete', 'state_reason': 'All done!', 'updated': '2020-02-12T17:03:00Z'},
+            {'state': 'complete', 'state_reason': 'All done!', 'updated': UPDATED_TIMESTAMP},
             {
                 'state': 'in_progress',
                 'state_reason': 'Starting things up',
-                'updated': '2020-02-12T17:03:00Z',
+                'updated': UPDATED_TIMESTAMP,
             },
         ],
         'state_reason': 'All done!',
-        'updated': '2020-02-12T17:03:00Z',
+        'updated': UPDATED_TIMESTAMP,
         'user': None,
     }
 
@@ -1065,10 +1297,10 @@ def test_patch_request_regenerate_bundle_success(
     )
     rv_json = rv.json
     assert rv.status_code == 200, rv_json
-    rv_json['state_history'][0]['updated'] = '2020-02-12T17:03:00Z'
-    rv_json['state_history'][1]['updated'] = '2020-02-12T17:03:00Z'
-    rv_json['updated'] = '2020-02-12T17:03:00Z'
-    rv_json['logs']['expiration'] = '2020-02-15T17:03:00Z'
+    rv_json['state_history'][0]['updated'] = UPDATED_TIMESTAMP
+    rv_json['state_history'][1]['updated'] = UPDATED_TIMESTAMP
+    rv_json['updated'] = UPDATED_TIMESTAMP
+    rv_json['logs']['expiration'] = LOGS_EXPIRATION
     assert rv_json == response_json
     mock_smfsc.assert_called_once_with(mock.ANY)
 
@@ -1097,10 +1329,7 @@ def test_remove_operator_success(mock_smfsc, mock_rm, db, auth_env, client):
         'id': 1,
         'index_image': None,
         'index_image_resolved': None,
-        'logs': {
-            'url': 'http://localhost/api/v1/builds/1/logs',
-            'expiration': '2020-02-15T17:03:00Z',
-        },
+        'logs': {'url': 'http://localhost/api/v1/builds/1/logs', 'expiration': LOGS_EXPIRATION},
         'organization': None,
         'removed_operators': ['some:thing'],
         'request_type': 'rm',
@@ -1109,19 +1338,19 @@ def test_remove_operator_success(mock_smfsc, mock_rm, db, auth_env, client):
             {
                 'state': 'in_progress',
                 'state_reason': 'The request was initiated',
-                'updated': '2020-02-12T17:03:00Z',
+                'updated': UPDATED_TIMESTAMP,
             }
         ],
         'state_reason': 'The request was initiated',
-        'updated': '2020-02-12T17:03:00Z',
+        'updated': UPDATED_TIMESTAMP,
         'user': 'tbrady@DOMAIN.LOCAL',
     }
 
     rv = client.post('/api/v1/builds/rm', json=data, environ_base=auth_env)
     rv_json = rv.json
-    rv_json['state_history'][0]['updated'] = '2020-02-12T17:03:00Z'
-    rv_json['updated'] = '2020-02-12T17:03:00Z'
-    rv_json['logs']['expiration'] = '2020-02-15T17:03:00Z'
+    rv_json['state_history'][0]['updated'] = UPDATED_TIMESTAMP
+    rv_json['updated'] = UPDATED_TIMESTAMP
+    rv_json['logs']['expiration'] = LOGS_EXPIRATION
     mock_rm.apply_async.assert_called_once()
     assert rv.status_code == 201
     assert response_json == rv_json
@@ -1177,7 +1406,15 @@ def test_remove_operator_overwrite_token_redacted(mock_smfsc, mock_hrr, app, aut
 @mock.patch('iib.web.api_v1.handle_rm_request')
 @mock.patch('iib.web.api_v1.messaging.send_message_for_state_change')
 def test_remove_operator_custom_user_queue(
-    mock_smfsc, mock_hrr, app, auth_env, client, user_to_queue, overwrite_from_index, expected_queue
+    mock_smfsc,
+    mock_hrr,
+    app,
+    auth_env,
+    client,
+    db,
+    user_to_queue,
+    overwrite_from_index,
+    expected_queue,
 ):
     app.config['IIB_USER_TO_QUEUE'] = user_to_queue
     data = {
@@ -1199,7 +1436,7 @@ def test_remove_operator_custom_user_queue(
     mock_smfsc.assert_called_once_with(mock.ANY, new_batch_msg=True)
 
 
-def test_not_found(client):
+def test_not_found(client, db):
     rv = client.get('/api/v1/builds/1234')
     assert rv.status_code == 404
     assert rv.json == {'error': 'The requested resource was not found'}
@@ -1210,9 +1447,6 @@ def test_not_found(client):
 def test_regenerate_bundle_success(mock_smfsc, mock_hrbr, db, auth_env, client):
     data = {'from_bundle_image': 'registry.example.com/bundle-image:latest'}
 
-    # Assume a timestamp to simplify tests
-    _timestamp = '2020-02-12T17:03:00Z'
-
     response_json = {
         'arches': [],
         'batch': 1,
@@ -1220,10 +1454,7 @@ def test_regenerate_bundle_success(mock_smfsc, mock_hrbr, db, auth_env, client):
         'bundle_image': None,
         'from_bundle_image': 'registry.example.com/bundle-image:latest',
         'from_bundle_image_resolved': None,
-        'logs': {
-            'url': 'http://localhost/api/v1/builds/1/logs',
-            'expiration': '2020-02-15T17:03:00Z',
-        },
+        'logs': {'url': 'http://localhost/api/v1/builds/1/logs', 'expiration': LOGS_EXPIRATION},
         'organization': None,
         'id': 1,
         'request_type': 'regenerate-bundle',
@@ -1232,20 +1463,20 @@ def test_regenerate_bundle_success(mock_smfsc, mock_hrbr, db, auth_env, client):
             {
                 'state': 'in_progress',
                 'state_reason': 'The request was initiated',
-                'updated': _timestamp,
+                'updated': UPDATED_TIMESTAMP,
             }
         ],
         'state_reason': 'The request was initiated',
-        'updated': _timestamp,
+        'updated': UPDATED_TIMESTAMP,
         'user': 'tbrady@DOMAIN.LOCAL',
     }
 
     rv = client.post('/api/v1/builds/regenerate-bundle', json=data, environ_base=auth_env)
     assert rv.status_code == 201
     rv_json = rv.json
-    rv_json['state_history'][0]['updated'] = _timestamp
-    rv_json['updated'] = _timestamp
-    rv_json['logs']['expiration'] = '2020-02-15T17:03:00Z'
+    rv_json['state_history'][0]['updated'] = UPDATED_TIMESTAMP
+    rv_json['updated'] = UPDATED_TIMESTAMP
+    rv_json['logs']['expiration'] = LOGS_EXPIRATION
     assert response_json == rv_json
     mock_hrbr.apply_async.assert_called_once()
     mock_smfsc.assert_called_once_with(mock.ANY, new_batch_msg=True)
@@ -1301,7 +1532,7 @@ def test_regenerate_bundle_missing_required_param(
 @mock.patch('iib.web.api_v1.handle_regenerate_bundle_request')
 @mock.patch('iib.web.api_v1.messaging.send_message_for_state_change')
 def test_regenerate_bundle_custom_user_queue(
-    mock_smfsc, mock_hrbr, app, auth_env, client, user_to_queue, expected_queue
+    mock_smfsc, mock_hrbr, app, auth_env, client, db, user_to_queue, expected_queue
 ):
     app.config['IIB_USER_TO_QUEUE'] = user_to_queue
     data = {'from_bundle_image': 'registry.example.com/bundle-image:latest'}
@@ -1595,10 +1826,7 @@ def test_merge_index_image_success(
         'distribution_scope': distribution_scope,
         'id': 1,
         'index_image': None,
-        'logs': {
-            'expiration': '2020-02-15T17:03:00Z',
-            'url': 'http://localhost/api/v1/builds/1/logs',
-        },
+        'logs': {'expiration': LOGS_EXPIRATION, 'url': 'http://localhost/api/v1/builds/1/logs'},
         'request_type': 'merge-index-image',
         'source_from_index': 'source_index:image',
         'source_from_index_resolved': None,
@@ -1607,20 +1835,20 @@ def test_merge_index_image_success(
             {
                 'state': 'in_progress',
                 'state_reason': 'The request was initiated',
-                'updated': '2020-02-12T17:03:00Z',
+                'updated': UPDATED_TIMESTAMP,
             }
         ],
         'state_reason': 'The request was initiated',
         'target_index': 'target_index:image',
         'target_index_resolved': None,
-        'updated': '2020-02-12T17:03:00Z',
+        'updated': UPDATED_TIMESTAMP,
         'user': 'tbrady@DOMAIN.LOCAL',
     }
     rv = client.post('/api/v1/builds/merge-index-image', json=data, environ_base=auth_env)
     rv_json = rv.json
-    rv_json['state_history'][0]['updated'] = '2020-02-12T17:03:00Z'
-    rv_json['updated'] = '2020-02-12T17:03:00Z'
-    rv_json['logs']['expiration'] = '2020-02-15T17:03:00Z'
+    rv_json['state_history'][0]['updated'] = UPDATED_TIMESTAMP
+    rv_json['updated'] = UPDATED_TIMESTAMP
+    rv_json['logs']['expiration'] = LOGS_EXPIRATION
     mock_merge.apply_async.assert_called_once()
     assert rv.status_code == 201
     assert response_json == rv_json
@@ -1684,6 +1912,7 @@ def test_merge_index_image_custom_user_queue(
     app,
     auth_env,
     client,
+    db,
     user_to_queue,
     overwrite_from_index,
     expected_queue,
@@ -1712,7 +1941,7 @@ def test_merge_index_image_custom_user_queue(
 @mock.patch('iib.web.api_v1.handle_merge_request')
 @mock.patch('iib.web.api_v1.messaging.send_message_for_state_change')
 def test_merge_index_image_fail_on_missing_overwrite_params(
-    mock_smfsc, mock_merge, app, auth_env, client, overwrite_from_index
+    mock_smfsc, mock_merge, app, auth_env, client, db, overwrite_from_index
 ):
     data = {
         'deprecation_list': ['some@sha256:bundle'],
@@ -1783,7 +2012,7 @@ def test_merge_index_image_fail_on_missing_overwrite_params(
 @mock.patch('iib.web.api_v1.handle_merge_request')
 @mock.patch('iib.web.api_v1.messaging.send_message_for_state_change')
 def test_merge_index_image_fail_on_invalid_params(
-    mock_smfsc, mock_merge, app, auth_env, client, data, error_msg
+    mock_smfsc, mock_merge, app, auth_env, client, db, data, error_msg
 ):
     data = data
     rv = client.post('/api/v1/builds/merge-index-image', json=data, environ_base=auth_env)
@@ -1827,27 +2056,24 @@ def test_create_empty_index_success(
         'request_type': 'create-empty-index',
         'state': 'in_progress',
         'labels': labels,
-        'logs': {
-            'url': 'http://localhost/api/v1/builds/1/logs',
-            'expiration': '2020-02-15T17:03:00Z',
-        },
+        'logs': {'url': 'http://localhost/api/v1/builds/1/logs', 'expiration': LOGS_EXPIRATION},
         'state_history': [
             {
                 'state': 'in_progress',
                 'state_reason': 'The request was initiated',
-                'updated': '2020-02-12T17:03:00Z',
+                'updated': UPDATED_TIMESTAMP,
             }
         ],
         'state_reason': 'The request was initiated',
-        'updated': '2020-02-12T17:03:00Z',
+        'updated': UPDATED_TIMESTAMP,
         'user': 'tbrady@DOMAIN.LOCAL',
     }
 
     rv = client.post('/api/v1/builds/create-empty-index', json=data, environ_base=auth_env)
     rv_json = rv.json
-    rv_json['state_history'][0]['updated'] = '2020-02-12T17:03:00Z'
-    rv_json['updated'] = '2020-02-12T17:03:00Z'
-    rv_json['logs']['expiration'] = '2020-02-15T17:03:00Z'
+    rv_json['state_history'][0]['updated'] = UPDATED_TIMESTAMP
+    rv_json['updated'] = UPDATED_TIMESTAMP
+    rv_json['logs']['expiration'] = LOGS_EXPIRATION
     assert rv.status_code == 201
     assert response_json == rv_json
     assert 'overwrite_from_index_token' not in rv_json
@@ -1,7 +1,10 @@
 from unittest import mock
 
 from kombu.exceptions import OperationalError
+import pytest
 
+from iib.exceptions import IIBError
+from iib.web.errors import handle_broker_batch_error, handle_broker_error
 from iib.web.models import Request, RequestStateMapping, RequestState, RequestAdd, RequestRm
 
 
@@ -198,3 +201,22 @@ def test_add_rm_batch_rm_failure(mock_smfnbor, mock_hrr, mock_har, app, auth_env
     # First request is processed because we are testing failing on RequestRM
     assert req_add.state.state == RequestStateMapping.in_progress.value
     assert req_rm.state.state == RequestStateMapping.failed.value
+
+
+@pytest.mark.parametrize('batch', (False, True))
+@mock.patch('iib.web.errors.messaging.send_message_for_state_change')
+def test_broker_error_invalidates_cache(
+    mock_smfsc, batch, client, db, dogpile_region, minimal_request_add
+):
+    minimal_request_add.add_state('in_progress', 'Starting things up')
+    db.session.commit()
+    request_id = minimal_request_add.id
+    assert client.get(f'/api/v1/builds/{request_id}').json['state'] == 'in_progress'
+
+    with pytest.raises(IIBError):
+        if batch:
+            handle_broker_batch_error([minimal_request_add])
+        else:
+            handle_broker_error(minimal_request_add)
+
+    assert client.get(f'/api/v1/builds/{request_id}').json['state'] == 'failed'
@@ -4,6 +4,7 @@ import random
 import flask_migrate
 import pytest
 
+from iib.web.app import create_app, db as _db
 from iib.web.models import (
     RequestAdd,
     RequestMergeIndexImage,
@@ -16,6 +17,30 @@ from iib.web.models import (
 INITIAL_DB_REVISION = '274ba38408e8'
 
 
+@pytest.fixture()
+def app():
+    """
+    Return a Flask application with its own in-memory database.
+
+    The migrations commit their changes, so these tests can't share the database that the other
+    tests roll back after each test.
+    """
+    app = create_app('iib.web.config.TestingConfig')
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture()
+def db(app):
+    """Yield a DB with required app tables but with no records."""
+    flask_migrate.upgrade()
+
+    yield _db
+
+    _db.session.remove()
+    _db.engine.dispose()
+
+
 def test_migrate_to_polymorphic_requests(app, auth_env, client, db):
     total_requests = 20
     # flask_login.current_user is used in RequestAdd.from_json and RequestRm.from_json,
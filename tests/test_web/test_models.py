@@ -21,6 +21,21 @@ def test_request_add_architecture(db, minimal_request):
     assert len(minimal_request.architectures) == 2
 
 
+def test_request_add_architectures(db, minimal_request):
+    db.session.add(models.Architecture(name='s390x'))
+    db.session.commit()
+
+    minimal_request.add_architectures(['amd64', 's390x', 'amd64'])
+    db.session.commit()
+    assert [arch.name for arch in minimal_request.architectures] == ['amd64', 's390x']
+    assert models.Architecture.query.count() == 2
+
+    # Verify that the method is idempotent
+    minimal_request.add_architectures(['s390x', 'amd64'])
+    db.session.commit()
+    assert len(minimal_request.architectures) == 2
+
+
 def test_request_add_state(db, minimal_request):
     minimal_request.add_state('in_progress', 'Starting things up')
     minimal_request.add_state('complete', 'All done!')
@@ -92,6 +107,26 @@ def test_request_type_validation(type_num, is_valid):
             models.Request(type=type_num)
 
 
+def test_image_get_or_create_many(db):
+    existing_image = models.Image(pull_specification='quay.io/ns/existing:latest')
+    db.session.add(existing_image)
+    db.session.commit()
+
+    pull_specs = ['quay.io/ns/new:latest', 'quay.io/ns/existing:latest', 'quay.io/ns/new:latest']
+    images = models.Image.get_or_create_many(pull_specs)
+    db.session.commit()
+
+    assert set(images) == {'quay.io/ns/existing:latest', 'quay.io/ns/new:latest'}
+    assert images['quay.io/ns/existing:latest'] is existing_image
+    assert images['quay.io/ns/new:latest'].id is not None
+    assert models.Image.query.count() == 2
+
+
+def test_image_get_or_create_many_invalid_pull_spec(db):
+    with pytest.raises(ValidationError, match='Image quay.io/ns/image should have a tag'):
+        models.Image.get_or_create_many(['quay.io/ns/image:latest', 'quay.io/ns/image'])
+
+
 def test_batch_user(db, minimal_request_add, minimal_request_rm):
     minimal_request_add.user = models.User(username='han_solo@SW.COM')
     minimal_request_rm.user = models.User(username='yoda@SW.COM')